@@ -57,9 +57,6 @@ if py3k:
     binary_type = bytes
     text_type = str
 
-    def callable(fn):  # noqa
-        return hasattr(fn, "__call__")
-
     def u(s):
         return s
 
@@ -73,7 +70,6 @@ else:
     string_types = (basestring,)  # noqa
     binary_type = str
     text_type = unicode  # noqa
-    callable = callable  # noqa
 
     def u(s):
         return unicode(s, "utf-8")  # noqa
@@ -83,6 +79,10 @@ else:
 
     range = xrange  # noqa
 
+# the builtin is present in all supported versions; Python 3.0 and 3.1,
+# which lacked it, are no longer supported
+callable = callable  # noqa
+
 if py3k:
     import collections.abc as collections_abc
 else:
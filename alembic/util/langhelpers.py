@@ -1,6 +1,7 @@
+import binascii
 import collections
+import os
 import textwrap
-import uuid
 import warnings
 
 from .compat import callable
@@ -11,10 +12,35 @@ from .compat import string_types
 from .compat import with_metaclass
 
 
+_PROXY_TEMPLATE = textwrap.dedent(
+    """\
+    def %(name)s(*args, **kw):
+        %(doc)r
+        %(translate)s
+        if _proxy is None:
+            _name_error(%(name)r)
+        return _proxy.%(name)s(*args, **kw)
+    """
+)
+
+
+class _ModuleClsSetup(object):
+    """Per-class state for :class:`.ModuleClsProxy`."""
+
+    __slots__ = ("attr_names", "modules")
+
+    def __init__(self):
+        # names of non-callable attributes copied into each module
+        self.attr_names = set()
+        # (globals_, locals_) of each module the class is proxied into
+        self.modules = []
+
+
 class _ModuleClsMeta(type):
     def __setattr__(cls, key, value):
         super(_ModuleClsMeta, cls).__setattr__(key, value)
-        cls._update_module_proxies(key)
+        if not key.startswith("_"):
+            cls._update_module_proxies(key)
 
 
 class ModuleClsProxy(with_metaclass(_ModuleClsMeta)):
@@ -26,38 +52,49 @@ class ModuleClsProxy(with_metaclass(_ModuleClsMeta)):
 
     """
 
-    _setups = collections.defaultdict(lambda: (set(), []))
+    _setups = collections.defaultdict(_ModuleClsSetup)
+    _proxy_code_cache = {}
 
     @classmethod
     def _update_module_proxies(cls, name):
-        attr_names, modules = cls._setups[cls]
-        for globals_, locals_ in modules:
-            cls._add_proxied_attribute(name, globals_, locals_, attr_names)
+        setup = cls._setups.get(cls)
+        if setup is None:
+            return
+        for globals_, locals_ in setup.modules:
+            cls._add_proxied_attribute(
+                name, globals_, locals_, setup.attr_names
+            )
 
     def _install_proxy(self):
-        attr_names, modules = self._setups[self.__class__]
-        for globals_, locals_ in modules:
-            globals_["_proxy"] = self
-            for attr_name in attr_names:
-                globals_[attr_name] = getattr(self, attr_name)
+        setup = self._setups[self.__class__]
+        proxied = {
+            attr_name: getattr(self, attr_name)
+            for attr_name in setup.attr_names
+        }
+        proxied["_proxy"] = self
+        for globals_, locals_ in setup.modules:
+            globals_.update(proxied)
 
     def _remove_proxy(self):
-        attr_names, modules = self._setups[self.__class__]
-        for globals_, locals_ in modules:
+        setup = self._setups[self.__class__]
+        for globals_, locals_ in setup.modules:
             globals_["_proxy"] = None
-            for attr_name in attr_names:
-                del globals_[attr_name]
+            for attr_name in setup.attr_names:
+                globals_.pop(attr_name, None)
 
     @classmethod
     def create_module_class_proxy(cls, globals_, locals_):
-        attr_names, modules = cls._setups[cls]
-        modules.append((globals_, locals_))
-        cls._setup_proxy(globals_, locals_, attr_names)
+        setup = cls._setups[cls]
+        setup.modules.append((globals_, locals_))
+        globals_.setdefault("_proxy", None)
+        cls._setup_proxy(globals_, locals_, setup)
 
     @classmethod
-    def _setup_proxy(cls, globals_, locals_, attr_names):
+    def _setup_proxy(cls, globals_, locals_, setup):
         for methname in dir(cls):
-            cls._add_proxied_attribute(methname, globals_, locals_, attr_names)
+            cls._add_proxied_attribute(
+                methname, globals_, locals_, setup.attr_names
+            )
 
     @classmethod
     def _add_proxied_attribute(cls, methname, globals_, locals_, attr_names):
@@ -65,15 +102,13 @@ class ModuleClsProxy(with_metaclass(_ModuleClsMeta)):
             meth = getattr(cls, methname)
             if callable(meth):
                 locals_[methname] = cls._create_method_proxy(
-                    methname, globals_, locals_
+                    methname, meth, globals_, locals_
                 )
             else:
                 attr_names.add(methname)
 
     @classmethod
-    def _create_method_proxy(cls, name, globals_, locals_):
-        fn = getattr(cls, name)
-
+    def _create_method_proxy(cls, name, fn, globals_, locals_):
         def _name_error(name):
             raise NameError(
                 "Can't invoke function '%s', as the proxy object has "
@@ -87,77 +122,81 @@ class ModuleClsProxy(with_metaclass(_ModuleClsMeta)):
 
         translations = getattr(fn, "_legacy_translations", [])
         if translations:
-            spec = inspect_getargspec(fn)
-            if spec[0] and spec[0][0] == "self":
-                spec[0].pop(0)
-
-            outer_args = inner_args = "*args, **kw"
-            translate_str = "args, kw = _translate(%r, %r, %r, args, kw)" % (
-                fn.__name__,
-                tuple(spec),
-                translations,
+            globals_["_warn"] = warnings.warn
+
+        # the same source is generated for every module the proxy is
+        # installed into, so compile it once and only exec the resulting
+        # code object against each module's globals.
+        func_text = cls._proxy_func_text(name, fn, translations)
+        code = cls._proxy_code_cache.get(func_text)
+        if code is None:
+            code = cls._proxy_code_cache[func_text] = compile(
+                func_text, "<alembic proxy %s>" % name, "exec"
             )
+        lcl = {}
+        exec_(code, globals_, lcl)
+        return lcl[name]
 
-            def translate(fn_name, spec, translations, args, kw):
-                return_kw = {}
-                return_args = []
-
-                for oldname, newname in translations:
-                    if oldname in kw:
-                        warnings.warn(
-                            "Argument %r is now named %r "
-                            "for method %s()." % (oldname, newname, fn_name)
-                        )
-                        return_kw[newname] = kw.pop(oldname)
-                return_kw.update(kw)
-
-                args = list(args)
-                if spec[3]:
-                    pos_only = spec[0][: -len(spec[3])]
-                else:
-                    pos_only = spec[0]
-                for arg in pos_only:
-                    if arg not in return_kw:
-                        try:
-                            return_args.append(args.pop(0))
-                        except IndexError:
-                            raise TypeError(
-                                "missing required positional argument: %s"
-                                % arg
-                            )
-                return_args.extend(args)
-
-                return return_args, return_kw
-
-            globals_["_translate"] = translate
+    @classmethod
+    def _proxy_func_text(cls, name, fn, translations):
+        if translations:
+            translate_str = _legacy_translate_source(
+                fn.__name__, _required_positional_args(fn), translations
+            )
         else:
-            outer_args = "*args, **kw"
-            inner_args = "*args, **kw"
             translate_str = ""
 
-        func_text = textwrap.dedent(
-            """\
-        def %(name)s(%(args)s):
-            %(doc)r
-            %(translate)s
-            try:
-                p = _proxy
-            except NameError:
-                _name_error('%(name)s')
-            return _proxy.%(name)s(%(apply_kw)s)
-            e
-        """
-            % {
-                "name": name,
-                "translate": translate_str,
-                "args": outer_args,
-                "apply_kw": inner_args,
-                "doc": fn.__doc__,
-            }
+        return _PROXY_TEMPLATE % {
+            "name": name,
+            "translate": translate_str,
+            "doc": fn.__doc__,
+        }
+
+
+def _legacy_translate_source(fn_name, pos_only, translations):
+    """Render the source which renames legacy keyword arguments and
+    checks for missing positional arguments, to be placed inline
+    in a generated proxy function."""
+
+    lines = []
+    for oldname, newname in translations:
+        lines.extend(
+            [
+                "if %r in kw:" % oldname,
+                "    _warn(%r)"
+                % (
+                    "Argument %r is now named %r for method %s()."
+                    % (oldname, newname, fn_name)
+                ),
+                "    kw.setdefault(%r, kw.pop(%r))" % (newname, oldname),
+            ]
         )
-        lcl = {}
-        exec_(func_text, globals_, lcl)
-        return lcl[name]
+    if pos_only:
+        lines.extend(
+            [
+                "missing = [arg for arg in %r if arg not in kw][len(args):]"
+                % (pos_only,),
+                "if missing:",
+                "    raise TypeError(",
+                "        'missing required positional argument: %s' "
+                "% missing[0]",
+                "    )",
+            ]
+        )
+    return "\n    ".join(lines)
+
+
+def _required_positional_args(fn):
+    """Return the names of the positional arguments of ``fn`` that
+    have no default, not including ``self``."""
+
+    spec = inspect_getargspec(fn)
+    args = spec[0]
+    if args and args[0] == "self":
+        args = args[1:]
+    if spec[3]:
+        args = args[: -len(spec[3])]
+    return tuple(args)
 
 
 def _with_legacy_names(translations):
@@ -168,17 +207,30 @@ def _with_legacy_names(translations):
     return decorate
 
 
+_TRUE_STRINGS = frozenset(["true", "True", "TRUE"])
+
+
 def asbool(value):
-    return value is not None and value.lower() == "true"
+    if value is None:
+        return False
+    elif value is True or value is False:
+        return value
+    elif value in _TRUE_STRINGS:
+        return True
+    else:
+        return value.lower() == "true"
 
 
 def rev_id():
-    return uuid.uuid4().hex[-12:]
+    return str(binascii.hexlify(os.urandom(6)).decode("ascii"))
 
 
 def to_list(x, default=None):
     if x is None:
         return default
+    elif type(x) is list or type(x) is tuple:
+        # always copy, as callers may mutate the returned list
+        return list(x)
     elif isinstance(x, string_types):
         return [x]
     elif isinstance(x, collections_abc.Iterable):
@@ -190,6 +242,10 @@ def to_list(x, default=None):
 def to_tuple(x, default=None):
     if x is None:
         return default
+    elif type(x) is tuple:
+        return x
+    elif type(x) is list:
+        return tuple(x)
     elif isinstance(x, string_types):
         return (x,)
     elif isinstance(x, collections_abc.Iterable):
@@ -241,12 +297,22 @@ class immutabledict(dict):
 
     def __new__(cls, *args):
         new = dict.__new__(cls)
-        dict.__init__(new, *args)
+        if args:
+            dict.__init__(new, *args)
         return new
 
     def __init__(self, *args):
         pass
 
+    def __hash__(self):
+        # contents can't change, so the hash is computed once and
+        # stored directly in the instance __dict__, bypassing the
+        # __setattr__ guard
+        h = self.__dict__.get("_hash")
+        if h is None:
+            h = self.__dict__["_hash"] = hash(frozenset(self.items()))
+        return h
+
     def __reduce__(self):
         return immutabledict, (dict(self),)
 
@@ -263,8 +329,11 @@ class immutabledict(dict):
 
 
 class Dispatcher(object):
+    __slots__ = ("_registry", "_cache", "uselist")
+
     def __init__(self, uselist=False):
         self._registry = {}
+        self._cache = {}
         self.uselist = uselist
 
     def dispatch_for(self, target, qualifier="default"):
@@ -274,26 +343,55 @@ class Dispatcher(object):
             else:
                 assert (target, qualifier) not in self._registry
                 self._registry[(target, qualifier)] = fn
+            self._cache.clear()
             return fn
 
         return decorate
 
     def dispatch(self, obj, qualifier="default"):
 
-        if isinstance(obj, string_types):
-            targets = [obj]
-        elif isinstance(obj, type):
-            targets = obj.__mro__
+        if isinstance(obj, string_types) or isinstance(obj, type):
+            key = (obj, qualifier)
         else:
-            targets = type(obj).__mro__
+            key = (type(obj), qualifier)
 
+        fn = self._cache.get(key)
+        if fn is None:
+            if isinstance(obj, string_types):
+                targets = [obj]
+            else:
+                targets = key[0].__mro__
+            fn = self._resolve(key, targets)
+            if fn is None:
+                raise ValueError("no dispatch function for object: %s" % obj)
+        return fn
+
+    def preresolve(self, types, qualifier="default"):
+        """Resolve and cache the dispatch function for each of the
+        given types ahead of the first call to :meth:`.dispatch`.
+
+        Types for which there is no dispatch function are skipped.
+        The cache is reset by any subsequent :meth:`.dispatch_for`.
+
+        """
+        for type_ in types:
+            if (type_, qualifier) not in self._cache:
+                self._resolve((type_, qualifier), type_.__mro__)
+
+    def _resolve(self, key, targets):
+        qualifier = key[1]
         for spcls in targets:
             if qualifier != "default" and (spcls, qualifier) in self._registry:
-                return self._fn_or_list(self._registry[(spcls, qualifier)])
+                fn = self._fn_or_list(self._registry[(spcls, qualifier)])
+                break
             elif (spcls, "default") in self._registry:
-                return self._fn_or_list(self._registry[(spcls, "default")])
+                fn = self._fn_or_list(self._registry[(spcls, "default")])
+                break
         else:
-            raise ValueError("no dispatch function for object: %s" % obj)
+            return None
+
+        self._cache[key] = fn
+        return fn
 
     def _fn_or_list(self, fn_or_list):
         if self.uselist:
@@ -317,4 +415,5 @@ class Dispatcher(object):
             )
         else:
             d._registry.update(self._registry)
+            d._cache.update(self._cache)
         return d
@@ -861,8 +861,7 @@ class OpTest(TestBase):
         )
 
     def test_cant_op(self):
-        if hasattr(op, "_proxy"):
-            del op._proxy
+        op._proxy = None
         assert_raises_message(
             NameError,
             "Can't invoke function 'inline_literal', as the "
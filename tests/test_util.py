@@ -0,0 +1,372 @@
+import warnings
+
+from alembic import util
+from alembic.testing import assert_raises_message
+from alembic.testing import eq_
+from alembic.testing import is_
+from alembic.testing import mock
+from alembic.testing.fixtures import TestBase
+
+
+class DispatcherTest(TestBase):
+    def _fixture(self):
+        class Base(object):
+            pass
+
+        class Sub(Base):
+            pass
+
+        return Base, Sub
+
+    def test_dispatch_subclass(self):
+        Base, Sub = self._fixture()
+        d = util.Dispatcher()
+
+        @d.dispatch_for(Base)
+        def base(obj):
+            pass
+
+        is_(d.dispatch(Sub()), base)
+        is_(d.dispatch(Sub), base)
+        is_(d.dispatch(Base()), base)
+
+    def test_dispatch_cache_reset_on_register(self):
+        Base, Sub = self._fixture()
+        d = util.Dispatcher()
+
+        @d.dispatch_for(Base)
+        def base(obj):
+            pass
+
+        is_(d.dispatch(Sub()), base)
+
+        @d.dispatch_for(Sub)
+        def sub(obj):
+            pass
+
+        is_(d.dispatch(Sub()), sub)
+        is_(d.dispatch(Base()), base)
+
+    def test_dispatch_qualifier(self):
+        Base, Sub = self._fixture()
+        d = util.Dispatcher()
+
+        @d.dispatch_for(Base)
+        def base(obj):
+            pass
+
+        @d.dispatch_for(Base, "postgresql")
+        def base_pg(obj):
+            pass
+
+        is_(d.dispatch(Sub(), "postgresql"), base_pg)
+        is_(d.dispatch(Sub(), "mysql"), base)
+        is_(d.dispatch(Sub()), base)
+
+    def test_dispatch_uselist(self):
+        Base, Sub = self._fixture()
+        d = util.Dispatcher(uselist=True)
+        canary = []
+
+        @d.dispatch_for(Base)
+        def one(obj):
+            canary.append("one")
+
+        d.dispatch(Sub())(None)
+
+        @d.dispatch_for(Base)
+        def two(obj):
+            canary.append("two")
+
+        d.dispatch(Sub())(None)
+        eq_(canary, ["one", "one", "two"])
+
+    def test_dispatch_not_found(self):
+        Base, Sub = self._fixture()
+        d = util.Dispatcher()
+        assert_raises_message(
+            ValueError, "no dispatch function for object", d.dispatch, Sub()
+        )
+
+    def test_preresolve(self):
+        Base, Sub = self._fixture()
+
+        class Other(object):
+            pass
+
+        d = util.Dispatcher()
+
+        @d.dispatch_for(Base)
+        def base(obj):
+            pass
+
+        d.preresolve([Sub, Other])
+
+        with mock.patch.object(
+            util.Dispatcher, "_resolve", side_effect=AssertionError
+        ):
+            is_(d.dispatch(Sub()), base)
+            is_(d.dispatch(Sub), base)
+
+        assert_raises_message(
+            ValueError, "no dispatch function for object", d.dispatch, Other()
+        )
+
+        @d.dispatch_for(Sub)
+        def sub(obj):
+            pass
+
+        is_(d.dispatch(Sub()), sub)
+        is_(d.dispatch(Base()), base)
+
+    def test_branch_is_independent(self):
+        Base, Sub = self._fixture()
+        d = util.Dispatcher()
+
+        @d.dispatch_for(Base)
+        def base(obj):
+            pass
+
+        is_(d.dispatch(Sub()), base)
+
+        d2 = d.branch()
+
+        @d2.dispatch_for(Sub)
+        def sub(obj):
+            pass
+
+        is_(d2.dispatch(Sub()), sub)
+        is_(d.dispatch(Sub()), base)
+
+
+class AsBoolTest(TestBase):
+    def test_strings(self):
+        for value, expected in [
+            ("true", True),
+            ("True", True),
+            ("tRUe", True),
+            ("false", False),
+            ("False", False),
+            ("", False),
+            ("yes", False),
+        ]:
+            eq_(util.asbool(value), expected)
+
+    def test_none(self):
+        is_(util.asbool(None), False)
+
+    def test_bools(self):
+        is_(util.asbool(True), True)
+        is_(util.asbool(False), False)
+
+
+class RevIdTest(TestBase):
+    def test_format(self):
+        rid = util.rev_id()
+        eq_(len(rid), 12)
+        int(rid, 16)
+
+    def test_unique(self):
+        eq_(len(set(util.rev_id() for i in range(100))), 100)
+
+
+class ToListToTupleTest(TestBase):
+    def test_to_list(self):
+        eq_(util.to_list(None), None)
+        eq_(util.to_list(None, default=[]), [])
+        eq_(util.to_list("abc"), ["abc"])
+        eq_(util.to_list(("a", "b")), ["a", "b"])
+        eq_(util.to_list(set(["a"])), ["a"])
+        eq_(util.to_list(5), [5])
+
+    def test_to_list_copies(self):
+        orig = ["a", "b"]
+        result = util.to_list(orig)
+        eq_(result, orig)
+        assert result is not orig
+
+    def test_to_tuple(self):
+        orig = ("a", "b")
+        is_(util.to_tuple(orig), orig)
+        eq_(util.to_tuple(None, default=()), ())
+        eq_(util.to_tuple("abc"), ("abc",))
+        eq_(util.to_tuple(["a", "b"]), ("a", "b"))
+        eq_(util.to_tuple(set(["a"])), ("a",))
+        eq_(util.to_tuple(5), (5,))
+
+
+class ModuleClsProxyTest(TestBase):
+    def _fixture(self):
+        class Target(util.ModuleClsProxy):
+            some_attr = "some value"
+
+            def __init__(self, value):
+                self.value = value
+
+            def get_value(self, x, y=5):
+                """return the value."""
+                return (self.value, x, y)
+
+        return Target
+
+    def _module(self, cls):
+        globals_ = {}
+        cls.create_module_class_proxy(globals_, globals_)
+        return globals_
+
+    def test_proxy_methods(self):
+        Target = self._fixture()
+        m1, m2 = self._module(Target), self._module(Target)
+        eq_(m1["get_value"].__doc__, "return the value.")
+        self._assert_no_proxy(m1)
+
+        target = Target("v1")
+        target._install_proxy()
+        eq_(m1["get_value"](1), ("v1", 1, 5))
+        eq_(m2["get_value"](1, y=2), ("v1", 1, 2))
+        eq_(m1["some_attr"], "some value")
+
+        target._remove_proxy()
+        assert "some_attr" not in m1
+        self._assert_no_proxy(m1)
+        self._assert_no_proxy(m2)
+
+    def _assert_no_proxy(self, module):
+        assert_raises_message(
+            NameError,
+            "Can't invoke function 'get_value', as the proxy object has "
+            "not yet been established for the Alembic 'Target' class.",
+            module["get_value"],
+            1,
+        )
+
+    def test_proxy_new_method(self):
+        Target = self._fixture()
+        m1 = self._module(Target)
+
+        def get_value(self, x):
+            return ("new", x)
+
+        Target.get_value = get_value
+        Target.other_value = get_value
+        m2 = self._module(Target)
+
+        target = Target("v1")
+        target._install_proxy()
+        eq_(m1["get_value"](1), ("new", 1))
+        eq_(m1["other_value"](1), ("new", 1))
+        eq_(m2["other_value"](2), ("new", 2))
+        target._remove_proxy()
+
+    def test_proxy_method_deleted(self):
+        Target = self._fixture()
+
+        def other_value(self, x):
+            return ("other", x)
+
+        Target.other_value = other_value
+        self._module(Target)
+
+        del Target.other_value
+        m2 = self._module(Target)
+        assert "other_value" not in m2
+        assert "get_value" in m2
+        assert "create_module_class_proxy" in m2
+
+    def test_proxy_legacy_names_set_after_assignment(self):
+        Target = self._fixture()
+        self._module(Target)
+
+        def rename_value(self, new_name):
+            return ("renamed", new_name)
+
+        # as with Operations.register_operation(), the translations
+        # are applied after the method is assigned to the class, which
+        # has already generated proxies for the existing modules
+        Target.rename_value = rename_value
+        rename_value._legacy_translations = [("old_name", "new_name")]
+        m1 = self._module(Target)
+
+        target = Target("v1")
+        target._install_proxy()
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter("always")
+            eq_(m1["rename_value"](old_name="x"), ("renamed", "x"))
+        eq_(
+            [str(warning.message) for warning in w],
+            [
+                "Argument 'old_name' is now named 'new_name' "
+                "for method rename_value()."
+            ],
+        )
+        target._remove_proxy()
+
+    def test_proxy_unhashable_callable(self):
+        class UnhashableCallable(object):
+            __hash__ = None
+
+            def __call__(self):
+                return "called"
+
+        Target = self._fixture()
+        Target.unhashable = UnhashableCallable()
+        m1 = self._module(Target)
+
+        target = Target("v1")
+        target._install_proxy()
+        eq_(m1["unhashable"](), "called")
+        target._remove_proxy()
+
+    def test_proxy_method_changed_on_mixin(self):
+        class Mixin(object):
+            def get_value(self, x):
+                """mixin get_value."""
+                return ("mixin", x)
+
+        class Target(Mixin, util.ModuleClsProxy):
+            pass
+
+        m1 = self._module(Target)
+
+        def get_value(self, x):
+            """replaced get_value."""
+            return ("replaced", x)
+
+        # not a ModuleClsProxy class, so no proxies are updated here
+        Mixin.get_value = get_value
+        m2 = self._module(Target)
+
+        eq_(m1["get_value"].__doc__, "mixin get_value.")
+        eq_(m2["get_value"].__doc__, "replaced get_value.")
+
+        target = Target()
+        target._install_proxy()
+        eq_(m2["get_value"](2), ("replaced", 2))
+        target._remove_proxy()
+
+
+class ImmutableDictTest(TestBase):
+    def test_immutable(self):
+        d = util.immutabledict({"a": 1})
+        assert_raises_message(
+            TypeError, "immutabledict object is immutable", d.update, b=2
+        )
+        eq_(util.immutabledict(), {})
+
+    def test_hash(self):
+        d1 = util.immutabledict({"a": 1, "b": 2})
+        d2 = util.immutabledict([("b", 2), ("a", 1)])
+        eq_(hash(d1), hash(d2))
+        eq_(len(set([d1, d2, util.immutabledict()])), 2)
+        eq_({d1: "x"}[d2], "x")
+
+    def test_union_hash(self):
+        d1 = util.immutabledict({"a": 1})
+        hash(d1)
+        d2 = d1.union({"b": 2})
+        eq_(d2, {"a": 1, "b": 2})
+        eq_(hash(d2), hash(util.immutabledict({"a": 1, "b": 2})))
+
+    def test_unhashable_values(self):
+        d = util.immutabledict({"a": []})
+        assert_raises_message(TypeError, "unhashable", hash, d)